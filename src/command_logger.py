@@ -4,97 +4,162 @@ Command completion logger for tracking patterns and learning
 
 import json
 import logging
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
-from collections import defaultdict, Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    original TEXT NOT NULL,
+    completed TEXT NOT NULL,
+    prefix TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_prefix ON completions(prefix);
+CREATE INDEX IF NOT EXISTS idx_completions_original ON completions(original, completed);
+"""
+
+def _loads(raw: bytes):
+    """Parse JSON bytes with orjson when available"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
 class CommandLogger:
     """Tracks command completions and provides usage analytics"""
     
     def __init__(self, log_file: Optional[str] = None):
+        # log_file names the legacy JSON log; the database lives beside it
         self.log_file = Path(log_file or Path.home() / ".gemini_command_helper.json")
-        self.data = self._load_data()
+        self.db_file = self.log_file.with_suffix(".db")
+        self._local = threading.local()
+        
+        if not self.db_file.exists():
+            self._import_legacy_data()
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's database connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
     
-    def _load_data(self) -> Dict:
-        """Load existing log data"""
+    def _import_legacy_data(self):
+        """Import completions from the old JSON log file"""
         try:
-            if self.log_file.exists():
-                with open(self.log_file, 'r') as f:
-                    return json.load(f)
-            return {"completions": [], "stats": {}}
+            if not self.log_file.exists():
+                return
+            completions = _loads(self.log_file.read_bytes()).get("completions", [])
         except Exception as e:
-            logger.error(f"Error loading log data: {e}")
-            return {"completions": [], "stats": {}}
-    
-    def _save_data(self):
-        """Save log data to file"""
+            logger.error(f"Error reading legacy log data: {e}")
+            return
+        
+        # Build every row before the database file is created, so a bad row
+        # is skipped instead of leaving an empty database behind
+        rows = []
+        for entry in completions:
+            try:
+                row = (entry["timestamp"], entry["original"], entry["completed"])
+                if not all(isinstance(value, str) for value in row):
+                    raise ValueError("fields must be strings")
+            except Exception as e:
+                logger.warning(f"Skipping malformed legacy completion: {e}")
+                continue
+            
+            parts = entry["original"].split(None, 1)
+            rows.append(row + (parts[0] if parts else "",))
+        
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            with self._conn() as conn:
+                conn.executemany(
+                    "INSERT INTO completions (timestamp, original, completed, prefix) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+            logger.info(f"Imported {len(rows)} completions from legacy log")
         except Exception as e:
-            logger.error(f"Error saving log data: {e}")
+            logger.error(f"Error importing legacy log data: {e}")
     
     def log_completion(self, original_command: str, completed_command: str):
         """Log a command completion event"""
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "original": original_command,
-            "completed": completed_command,
-            "prefix": original_command.split()[0] if original_command.split() else ""
-        }
-        
-        self.data["completions"].append(entry)
-        self._update_stats()
-        self._save_data()
+        parts = original_command.split(None, 1)
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT INTO completions (timestamp, original, completed, prefix) VALUES (?, ?, ?, ?)",
+                    (datetime.now().isoformat(), original_command, completed_command, parts[0] if parts else "")
+                )
+        except Exception as e:
+            logger.error(f"Error logging completion: {e}")
+            return
         
         logger.info(f"Logged completion: '{original_command}' → '{completed_command}'")
     
-    def _update_stats(self):
-        """Update usage statistics"""
-        completions = self.data["completions"]
-        
-        # Count prefixes (e.g., 'pnpm', 'git', 'docker')
-        prefix_counts = Counter(entry["prefix"] for entry in completions)
-        
-        # Count full original commands
-        original_counts = Counter(entry["original"] for entry in completions)
-        
-        # Count completions
-        completion_counts = Counter(entry["completed"] for entry in completions)
-        
-        self.data["stats"] = {
-            "total_completions": len(completions),
-            "most_common_prefixes": dict(prefix_counts.most_common(10)),
-            "most_forgotten_commands": dict(original_counts.most_common(10)),
-            "most_common_completions": dict(completion_counts.most_common(10)),
-            "last_updated": datetime.now().isoformat()
-        }
+    def _most_common(self, column: str, limit: int = 10) -> Dict[str, int]:
+        """Count completions grouped by column, most frequent first"""
+        # Ties keep first-seen order, like Counter.most_common
+        rows = self._conn().execute(
+            f"SELECT {column} AS value, COUNT(*) AS n FROM completions "
+            f"GROUP BY {column} ORDER BY n DESC, MIN(id) LIMIT ?",
+            (limit,)
+        )
+        return {row["value"]: row["n"] for row in rows}
     
     def get_stats(self) -> Dict:
         """Get usage statistics"""
-        return self.data.get("stats", {})
+        # Stats are never persisted; they are computed here from the log on demand
+        try:
+            total, last_logged = self._conn().execute(
+                "SELECT COUNT(*), MAX(timestamp) FROM completions"
+            ).fetchone()
+            if not total:
+                return {}
+            
+            return {
+                "total_completions": total,
+                # Prefixes (e.g., 'pnpm', 'git', 'docker')
+                "most_common_prefixes": self._most_common("prefix"),
+                "most_forgotten_commands": self._most_common("original"),
+                "most_common_completions": self._most_common("completed"),
+                "last_updated": last_logged
+            }
+        except Exception as e:
+            logger.error(f"Error reading stats: {e}")
+            return {}
     
     def get_recent_completions(self, limit: int = 10) -> List[Dict]:
         """Get recent completions"""
-        completions = self.data.get("completions", [])
-        return completions[-limit:] if completions else []
+        try:
+            rows = self._conn().execute(
+                "SELECT timestamp, original, completed, prefix FROM completions ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+            return [dict(row) for row in reversed(rows)]
+        except Exception as e:
+            logger.error(f"Error reading recent completions: {e}")
+            return []
     
     def suggest_completion(self, partial_command: str) -> Optional[str]:
         """Suggest completion based on historical data"""
-        completions = self.data.get("completions", [])
-        
-        # Find historical completions for this partial command
-        matches = [
-            entry["completed"] 
-            for entry in completions 
-            if entry["original"] == partial_command
-        ]
-        
-        if matches:
-            # Return the most common historical completion
-            return Counter(matches).most_common(1)[0][0]
-        
-        return None
+        # Return the most common historical completion for this partial command
+        try:
+            row = self._conn().execute(
+                "SELECT completed FROM completions WHERE original = ? "
+                "GROUP BY completed ORDER BY COUNT(*) DESC, MIN(id) LIMIT 1",
+                (partial_command,)
+            ).fetchone()
+            return row["completed"] if row else None
+        except Exception as e:
+            logger.error(f"Error suggesting completion: {e}")
+            return None
@@ -2,50 +2,79 @@
 Client for interacting with Google Gemini CLI
 """
 
+import shutil
 import subprocess
 import logging
-import os
 from typing import Optional
 import json
 import re
 
 logger = logging.getLogger(__name__)
 
+# Response lines that are explanatory text rather than a command
+_SKIP_RE = re.compile(r'here|the completed|command:|output:|result:', re.I)
+_STARTSWITH_RE = re.compile(r'(?:Note|Example|Usage):')
+
+# Static parts of the completion prompt, around the user's input
+_PROMPT_PREFIX = '''Convert this to a shell command. Return only the command, nothing else.
+
+Input: '''
+_PROMPT_SUFFIX = '''
+
+Examples:
+- "pnpm run" → "pnpm run dev"
+- "git status" → "git status"
+- "list files" → "ls -la"
+- "find a file named script.py" → "find . -name 'script.py'"
+- "search for text in files" → "grep -r 'text' ."
+- "show running processes" → "ps aux"
+- "check disk usage" → "df -h"
+- "install package" → "npm install"
+- "git add all files" → "git add ."
+
+Command:'''
+
 class GeminiClient:
     """Handles interaction with the Gemini CLI for command completion"""
     
+    # The CLI lookup only needs to run once per process
+    _availability_checked = False
+    
     def __init__(self):
         self.gemini_command = "gemini"
         self._test_gemini_availability()
     
     def _test_gemini_availability(self):
         """Test if Gemini CLI is available"""
-        try:
-            result = subprocess.run(
-                [self.gemini_command, '--help'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode != 0:
-                logger.warning("Gemini CLI may not be properly configured")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
+        if GeminiClient._availability_checked:
+            return
+        GeminiClient._availability_checked = True
+        
+        # A PATH lookup is enough; running 'gemini --help' costs a full CLI startup
+        if shutil.which(self.gemini_command) is None:
             logger.error("Gemini CLI not found. Please ensure it's installed and in PATH")
     
+    def run_prompt(self, prompt: str, timeout: int) -> subprocess.CompletedProcess:
+        """Run a single prompt through the Gemini CLI
+        
+        The CLI has no persistent stdin/REPL mode, so every prompt is a fresh
+        'gemini -p' run.
+        """
+        # Call Gemini CLI - use list format to avoid shell escaping issues
+        return subprocess.run(
+            [self.gemini_command, '-p', prompt],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    
     def complete_command(self, partial_command: str) -> Optional[str]:
         """Get command completion from Gemini AI"""
         try:
             # Create a focused prompt for command completion
             prompt = self._create_completion_prompt(partial_command)
             
-            # Call Gemini CLI - use list format to avoid shell escaping issues
-            result = subprocess.run(
-                [self.gemini_command, '-p', prompt],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                env=dict(os.environ)  # Inherit environment
-            )
+            result = self.run_prompt(prompt, timeout=30)
             
             if result.returncode == 0:
                 completion = self._parse_completion_response(result.stdout.strip())
@@ -63,55 +92,34 @@ class GeminiClient:
     
     def _create_completion_prompt(self, partial_command: str) -> str:
         """Create a focused prompt for command completion"""
-        return f'''Convert this to a shell command. Return only the command, nothing else.
-
-Input: {partial_command}
-
-Examples:
-- "pnpm run" → "pnpm run dev"
-- "git status" → "git status"
-- "list files" → "ls -la"
-- "find a file named script.py" → "find . -name 'script.py'"
-- "search for text in files" → "grep -r 'text' ."
-- "show running processes" → "ps aux"
-- "check disk usage" → "df -h"
-- "install package" → "npm install"
-- "git add all files" → "git add ."
-
-Command:'''
+        return _PROMPT_PREFIX + partial_command + _PROMPT_SUFFIX
     
     def _parse_completion_response(self, response: str) -> Optional[str]:
         """Parse the Gemini response to extract the completed command"""
         try:
-            # Clean up the response
-            response = response.strip()
-            
-            if not response:
-                return None
+            first_line = None
             
-            # Split into lines and find the most likely command
-            lines = [line.strip() for line in response.split('\n') if line.strip()]
-            
-            if not lines:
-                return None
-            
-            # Look for the first line that looks like a command
-            for line in lines:
-                # Skip obvious explanatory text
-                if any(skip in line.lower() for skip in ['here', 'the completed', 'command:', 'output:', 'result:']):
+            # Single pass: return the first line that looks like a command
+            for line in response.splitlines():
+                line = line.strip()
+                if not line:
                     continue
+                if first_line is None:
+                    first_line = line
                 
-                # Clean the line but preserve quotes if they're balanced
-                line = line.strip()
+                # Skip obvious explanatory text
+                if _SKIP_RE.search(line):
+                    continue
                 
                 # If it looks like a command, return it (don't strip quotes if they're balanced)
-                if line and not line.endswith(':') and not line.startswith(('Note:', 'Example:', 'Usage:')):
+                if not line.endswith(':') and not _STARTSWITH_RE.match(line):
                     # Fix common quote issues
-                    line = self._fix_quotes(line)
-                    return line
+                    return self._fix_quotes(line)
+            
+            if first_line is None:
+                return None
             
             # Fallback: return the first non-empty line
-            first_line = lines[0].strip()
             return self._fix_quotes(first_line)
             
         except Exception as e:
@@ -121,6 +129,10 @@ Command:'''
     def _fix_quotes(self, command: str) -> str:
         """Fix unbalanced quotes in commands"""
         try:
+            # Most responses contain no quotes at all
+            if "'" not in command and '"' not in command:
+                return command
+            
             # Count quotes
             single_quotes = command.count("'")
             double_quotes = command.count('"')
@@ -3,6 +3,8 @@ Global hotkey listener for cmd+g to trigger command completion
 """
 
 import logging
+import queue
+import threading
 from pynput import keyboard
 from pynput.keyboard import Key, KeyCode
 from rich.console import Console
@@ -13,40 +15,71 @@ from src import command_logger
 console = Console()
 logger = logging.getLogger(__name__)
 
+# Bits in HotkeyService.key_mask for the keys making up the cmd+g hotkey
+_CMD = 1 << 0
+_G = 1 << 1
+_HOTKEY = _CMD | _G
+
 class HotkeyService:
     def __init__(self, debug: bool = False):
         self.debug = debug
         self.terminal = terminal_interface.TerminalInterface()
         self.gemini = gemini_client.GeminiClient()
         self.logger = command_logger.CommandLogger()
-        self.pressed_keys = set()
+        self.key_mask = 0
+        
+        # Completions run on a worker so the listener thread never blocks;
+        # _busy stays set from the press until that completion has finished,
+        # and presses arriving in the meantime are dropped
+        self._work_q = queue.Queue()
+        self._busy = threading.Event()
+        threading.Thread(target=self._worker, daemon=True).start()
         
         if debug:
             logging.basicConfig(level=logging.DEBUG)
     
     def on_key_press(self, key):
         """Handle key press events"""
-        try:
-            self.pressed_keys.add(key)
+        # Special keys (ctrl, alt, etc.) have no char attribute
+        char = getattr(key, 'char', None)
+        
+        if key == Key.cmd:
+            self.key_mask |= _CMD
+        elif char == 'g':
+            self.key_mask |= _G
             
             # Check for cmd+g combination
-            if (Key.cmd in self.pressed_keys and 
-                (hasattr(key, 'char') and key.char == 'g')):
+            if self.key_mask == _HOTKEY:
                 self._handle_completion_request()
-                
-        except AttributeError:
-            # Special keys (ctrl, alt, etc.) might not have char attribute
-            pass
     
     def on_key_release(self, key):
         """Handle key release events"""
-        try:
-            self.pressed_keys.discard(key)
-        except KeyError:
-            pass
+        if key == Key.cmd:
+            self.key_mask &= ~_CMD
+        elif getattr(key, 'char', None) == 'g':
+            self.key_mask &= ~_G
     
     def _handle_completion_request(self):
         """Handle the cmd+g hotkey press"""
+        if self._busy.is_set():
+            if self.debug:
+                console.print("[yellow]Completion already in progress[/yellow]")
+            return
+        
+        self._busy.set()
+        self._work_q.put(None)
+    
+    def _worker(self):
+        """Process queued completion requests"""
+        while True:
+            self._work_q.get()
+            try:
+                self._complete_current_command()
+            finally:
+                self._busy.clear()
+    
+    def _complete_current_command(self):
+        """Complete the command currently typed in the terminal"""
         try:
             if self.debug:
                 console.print("[cyan]🔍 Hotkey detected! Getting current command...[/cyan]")
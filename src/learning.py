@@ -4,40 +4,118 @@ Learning module for generating quiz questions from shell commands
 
 import json
 import logging
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from src import gemini_client
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+_REQUIRED_FIELDS = frozenset({"question", "correct_answer", "wrong_options", "explanation"})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    question TEXT NOT NULL,
+    correct_answer TEXT NOT NULL UNIQUE,
+    wrong_options TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    times_asked INTEGER NOT NULL DEFAULT 0,
+    times_correct INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+def _dumps(obj) -> str:
+    """Serialize to a JSON string with orjson when available"""
+    return orjson.dumps(obj).decode() if orjson else json.dumps(obj)
+
+def _loads(raw):
+    """Parse JSON with orjson when available"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
 class LearningManager:
     """Manages quiz question generation and storage from shell commands"""
     
     def __init__(self, storage_file: Optional[str] = None):
+        # storage_file names the legacy JSON store; the database lives beside it
         self.storage_file = Path(storage_file or Path.home() / ".gemini_learning_questions.json")
-        self.data = self._load_data()
+        self.db_file = self.storage_file.with_suffix(".db")
+        self._local = threading.local()
+        
+        if not self.db_file.exists():
+            self._import_legacy_data()
         self.gemini = gemini_client.GeminiClient()
     
-    def _load_data(self) -> Dict:
-        """Load existing quiz questions"""
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's database connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+    
+    def _import_legacy_data(self):
+        """Import questions from the old JSON storage file"""
         try:
-            if self.storage_file.exists():
-                with open(self.storage_file, 'r') as f:
-                    return json.load(f)
-            return {"questions": [], "stats": {}}
+            if not self.storage_file.exists():
+                return
+            questions = _loads(self.storage_file.read_bytes()).get("questions", [])
         except Exception as e:
-            logger.error(f"Error loading learning data: {e}")
-            return {"questions": [], "stats": {}}
-    
-    def _save_data(self):
-        """Save quiz questions to file"""
+            logger.error(f"Error reading legacy learning data: {e}")
+            return
+        
+        # Build every row before the database file is created, so a bad row
+        # is skipped instead of leaving an empty database behind
+        rows = []
+        for q in questions:
+            try:
+                if not _REQUIRED_FIELDS <= q.keys():
+                    raise ValueError("missing required fields")
+                row = (
+                    q.get("id"),
+                    q["question"],
+                    q["correct_answer"],
+                    _dumps(q["wrong_options"]),
+                    q["explanation"],
+                    q.get("created_at", datetime.now().isoformat()),
+                    q.get("times_asked", 0),
+                    q.get("times_correct", 0)
+                )
+                if not all(isinstance(value, str) for value in row[1:6]):
+                    raise ValueError("text fields must be strings")
+                if not all(isinstance(value, int) for value in row[6:]):
+                    raise ValueError("counters must be integers")
+                if row[0] is not None and not isinstance(row[0], int):
+                    raise ValueError("id must be an integer")
+            except Exception as e:
+                logger.warning(f"Skipping malformed legacy question: {e}")
+                continue
+            rows.append(row)
+        
         try:
-            self.storage_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.storage_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            with self._conn() as conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO questions "
+                    "(id, question, correct_answer, wrong_options, explanation, created_at, times_asked, times_correct) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+            logger.info(f"Imported {len(rows)} questions from legacy storage")
         except Exception as e:
-            logger.error(f"Error saving learning data: {e}")
+            logger.error(f"Error importing legacy learning data: {e}")
     
     def generate_question(self, command: str) -> Optional[Dict]:
         """Generate a quiz question from a shell command using Gemini"""
@@ -60,17 +138,10 @@ class LearningManager:
     def _call_gemini_for_question(self, prompt: str) -> Optional[str]:
         """Call Gemini CLI to generate question content"""
         import subprocess
-        import os
         
         try:
-            # Call Gemini CLI directly for question generation
-            result = subprocess.run(
-                ["gemini", "-p", prompt],
-                capture_output=True,
-                text=True,
-                timeout=60,  # Longer timeout for question generation
-                env=dict(os.environ)
-            )
+            # Longer timeout for question generation
+            result = self.gemini.run_prompt(prompt, timeout=60)
             
             if result.returncode == 0:
                 return result.stdout.strip()
@@ -118,17 +189,14 @@ Command to create question for: {command}
             # Try to find JSON in the response
             response = response.strip()
             
-            # Look for JSON block
+            # Decode the first JSON object, ignoring any text after it
             start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
             
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                question_data = json.loads(json_str)
+            if start_idx != -1:
+                question_data, _ = _JSON_DECODER.raw_decode(response, start_idx)
                 
                 # Validate required fields
-                required_fields = ["question", "correct_answer", "wrong_options", "explanation"]
-                if all(field in question_data for field in required_fields):
+                if _REQUIRED_FIELDS.issubset(question_data):
                     # Ensure correct answer matches original command
                     question_data["correct_answer"] = original_command
                     return question_data
@@ -146,8 +214,10 @@ Command to create question for: {command}
         """Generate and store a quiz question for a command"""
         try:
             # Check if we already have a question for this command
-            existing_questions = [q for q in self.data["questions"] if q["correct_answer"] == command]
-            if existing_questions:
+            exists = self._conn().execute(
+                "SELECT 1 FROM questions WHERE correct_answer = ?", (command,)
+            ).fetchone()
+            if exists:
                 logger.info(f"Question already exists for command: {command}")
                 return True
             
@@ -157,18 +227,19 @@ Command to create question for: {command}
                 logger.error(f"Failed to generate question for command: {command}")
                 return False
             
-            # Add metadata
-            question_data.update({
-                "id": len(self.data["questions"]) + 1,
-                "created_at": datetime.now().isoformat(),
-                "times_asked": 0,
-                "times_correct": 0
-            })
-            
             # Store the question
-            self.data["questions"].append(question_data)
-            self._update_stats()
-            self._save_data()
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT INTO questions (question, correct_answer, wrong_options, explanation, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        question_data["question"],
+                        command,
+                        _dumps(question_data["wrong_options"]),
+                        question_data["explanation"],
+                        datetime.now().isoformat()
+                    )
+                )
             
             logger.info(f"Stored question for command: {command}")
             return True
@@ -177,41 +248,55 @@ Command to create question for: {command}
             logger.error(f"Error storing question: {e}")
             return False
     
-    def _update_stats(self):
-        """Update learning statistics"""
-        questions = self.data["questions"]
-        
-        self.data["stats"] = {
-            "total_questions": len(questions),
-            "total_attempts": sum(q.get("times_asked", 0) for q in questions),
-            "total_correct": sum(q.get("times_correct", 0) for q in questions),
-            "accuracy_rate": (
-                sum(q.get("times_correct", 0) for q in questions) / max(sum(q.get("times_asked", 0) for q in questions), 1)
-            ),
-            "last_updated": datetime.now().isoformat()
-        }
-    
     def get_all_questions(self) -> List[Dict]:
         """Get all stored questions"""
-        return self.data.get("questions", [])
+        try:
+            rows = self._conn().execute("SELECT * FROM questions ORDER BY id").fetchall()
+        except Exception as e:
+            logger.error(f"Error reading questions: {e}")
+            return []
+        
+        questions = []
+        for row in rows:
+            question = dict(row)
+            question["wrong_options"] = _loads(question["wrong_options"])
+            questions.append(question)
+        return questions
     
     def get_stats(self) -> Dict:
         """Get learning statistics"""
-        return self.data.get("stats", {})
+        try:
+            total_questions, total_attempts, total_correct = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(times_asked), 0), COALESCE(SUM(times_correct), 0) FROM questions"
+            ).fetchone()
+        except Exception as e:
+            logger.error(f"Error reading learning stats: {e}")
+            return {}
+        
+        if not total_questions:
+            return {}
+        
+        return {
+            "total_questions": total_questions,
+            "total_attempts": total_attempts,
+            "total_correct": total_correct,
+            "accuracy_rate": total_correct / max(total_attempts, 1),
+            "last_updated": datetime.now().isoformat()
+        }
     
     def update_question_stats(self, question_id: int, was_correct: bool):
         """Update statistics for a specific question"""
+        self.bulk_update_question_stats([(question_id, was_correct)])
+    
+    def bulk_update_question_stats(self, updates: List[Tuple[int, bool]]):
+        """Record several (question_id, was_correct) answers in one transaction"""
         try:
-            questions = self.data.get("questions", [])
-            for question in questions:
-                if question.get("id") == question_id:
-                    question["times_asked"] = question.get("times_asked", 0) + 1
-                    if was_correct:
-                        question["times_correct"] = question.get("times_correct", 0) + 1
-                    break
-            
-            self._update_stats()
-            self._save_data()
+            with self._conn() as conn:
+                conn.executemany(
+                    "UPDATE questions SET times_asked = times_asked + 1, times_correct = times_correct + ? "
+                    "WHERE id = ?",
+                    [(int(was_correct), question_id) for question_id, was_correct in updates]
+                )
             
         except Exception as e:
             logger.error(f"Error updating question stats: {e}")
@@ -5,13 +5,13 @@ Learning integration for converting shell commands to quiz questions using -l fl
 
 import sys
 from typing import Optional
-from rich.console import Console
-from src import learning
-
-console = Console()
 
 def create_learning_question(args: list[str]) -> int:
     """Create a learning question from a shell command"""
+    from rich.console import Console
+    from src import learning
+    
+    console = Console()
     
     # Check if -l flag is present
     if '-l' not in args:
@@ -49,6 +49,8 @@ def create_learning_question(args: list[str]) -> int:
 def main():
     """Main entry point for learning integration"""
     if len(sys.argv) < 2:
+        from rich.console import Console
+        console = Console()
         console.print("[red]Usage: learning-integration <command> -l[/red]", file=sys.stderr)
         return 1
     
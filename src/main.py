@@ -4,13 +4,9 @@ Gemini Command Helper - AI-powered command line completion
 """
 
 import click
-from rich.console import Console
-from rich.table import Table
-from src import hotkey_listener
-from src import terminal_interface
-from src import command_logger
 
-console = Console()
+# Heavier imports (rich, pynput via hotkey_listener) are deferred to the
+# commands that need them to keep CLI startup fast
 
 @click.group()
 def cli():
@@ -21,6 +17,10 @@ def cli():
 @click.option('--debug', is_flag=True, help='Enable debug mode')
 def start(debug: bool):
     """Start the Gemini Command Helper service."""
+    from rich.console import Console
+    from src import hotkey_listener
+    
+    console = Console()
     console.print("[bold green]🚀 Starting Gemini Command Helper...[/bold green]")
     
     if debug:
@@ -38,6 +38,11 @@ def start(debug: bool):
 @cli.command()
 def stats():
     """Show usage statistics and patterns."""
+    from rich.console import Console
+    from rich.table import Table
+    from src import command_logger
+    
+    console = Console()
     logger = command_logger.CommandLogger()
     stats_data = logger.get_stats()
     
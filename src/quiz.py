@@ -3,33 +3,57 @@
 Interactive quiz runner for practicing shell command questions
 """
 
+import functools
+import heapq
 import random
 import sys
-from typing import List, Dict
-from rich.console import Console
-from rich.prompt import Prompt, Confirm
-from rich.panel import Panel
-from rich.table import Table
+from typing import List, Dict, Tuple
 from src import learning
 
-console = Console()
+def _import_rich():
+    """Import the rendering classes from fast_rich when installed, else rich"""
+    try:
+        # Rust-backed drop-in replacement for rich, used when installed
+        from fast_rich.console import Console, Group
+        from fast_rich.prompt import Prompt
+        from fast_rich.panel import Panel
+        from fast_rich.table import Table
+    except ImportError:
+        from rich.console import Console, Group
+        from rich.prompt import Prompt
+        from rich.panel import Panel
+        from rich.table import Table
+    return Console, Group, Prompt, Panel, Table
+
+@functools.lru_cache(maxsize=16)
+def _choices(n: int) -> Tuple[str, ...]:
+    """Answer choices '1'..'n' for Prompt.ask, shared across questions"""
+    # A tuple, because every caller receives the same cached object
+    return tuple(str(i) for i in range(1, n + 1))
 
 class QuizRunner:
     """Interactive quiz runner"""
     
     def __init__(self):
+        # rich is imported here rather than at module import time
+        Console, self.Group, self.Prompt, self.Panel, self.Table = _import_rich()
+        self.console = Console()
         self.learning_manager = learning.LearningManager()
         self.questions = self.learning_manager.get_all_questions()
+        self._by_id = {q["id"]: q for q in self.questions}
+        self._accuracy_cache: Dict[int, float] = {}
+        # (question_id, was_correct) answers not yet written to storage
+        self._pending_updates: List[Tuple[int, bool]] = []
         self.session_stats = {"correct": 0, "total": 0}
     
     def run_quiz(self, num_questions: int = None):
         """Run an interactive quiz session"""
         if not self.questions:
-            console.print("[yellow]📝 No quiz questions found![/yellow]")
-            console.print("[dim]Use './l <command>' to create questions first[/dim]")
+            self.console.print("[yellow]📝 No quiz questions found![/yellow]")
+            self.console.print("[dim]Use './l <command>' to create questions first[/dim]")
             return
         
-        console.print(Panel.fit(
+        self.console.print(self.Panel.fit(
             "[bold blue]🧠 Shell Command Quiz[/bold blue]\n"
             f"Available questions: {len(self.questions)}\n"
             "[dim]Choose the correct command for each question[/dim]",
@@ -39,56 +63,62 @@ class QuizRunner:
         # Determine number of questions to ask
         if num_questions is None:
             if len(self.questions) <= 5:
-                questions_to_ask = self.questions.copy()
+                num_questions = len(self.questions)
             else:
                 num_questions = min(10, len(self.questions))
-                console.print(f"[dim]Running quiz with {num_questions} questions[/dim]\n")
-                questions_to_ask = random.sample(self.questions, num_questions)
+                self.console.print(f"[dim]Running quiz with {num_questions} questions[/dim]\n")
         else:
             num_questions = min(num_questions, len(self.questions))
-            questions_to_ask = random.sample(self.questions, num_questions)
         
-        # Shuffle the questions
-        random.shuffle(questions_to_ask)
+        questions_to_ask = self._pick_questions(num_questions)
         
-        # Run the quiz
-        for i, question in enumerate(questions_to_ask, 1):
-            console.print(f"\n[bold]Question {i}/{len(questions_to_ask)}[/bold]")
-            self._ask_question(question)
+        # Run the quiz, saving all answers at the end (even if interrupted)
+        try:
+            for i, question in enumerate(questions_to_ask, 1):
+                self.console.print(f"\n[bold]Question {i}/{len(questions_to_ask)}[/bold]")
+                self._ask_question(question)
+        finally:
+            self._save_pending_updates()
         
         # Show final results
         self._show_results()
     
+    def _pick_questions(self, k: int) -> List[Dict]:
+        """Pick k questions in random order with a partial Fisher-Yates shuffle"""
+        idx = list(range(len(self.questions)))
+        for i in range(k):
+            j = random.randrange(i, len(idx))
+            idx[i], idx[j] = idx[j], idx[i]
+        return [self.questions[i] for i in idx[:k]]
+    
     def _ask_question(self, question: Dict):
         """Ask a single quiz question"""
-        # Prepare options
+        # Prepare options: shuffle the wrong ones, then insert the correct
+        # answer at a random position so its index is known without a search
         options = question["wrong_options"].copy()
-        options.append(question["correct_answer"])
         random.shuffle(options)
+        correct_pos = random.randint(0, len(options))
+        options.insert(correct_pos, question["correct_answer"])
+        correct_index = correct_pos + 1
         
-        # Find correct answer index (after shuffle)
-        correct_index = options.index(question["correct_answer"]) + 1
-        
-        # Display question
-        console.print(f"\n[yellow]{question['question']}[/yellow]")
-        console.print()
-        
-        # Display options
+        # Display question and options in a single render
+        buf = [f"\n[yellow]{question['question']}[/yellow]\n"]
         for i, option in enumerate(options, 1):
-            console.print(f"  [bold]{i}.[/bold] [cyan]{option}[/cyan]")
+            buf.append(f"  [bold]{i}.[/bold] [cyan]{option}[/cyan]")
+        self.console.print("\n".join(buf))
         
         # Get user answer
         while True:
             try:
-                answer = Prompt.ask(
+                answer = self.Prompt.ask(
                     "\nYour answer",
-                    choices=[str(i) for i in range(1, len(options) + 1)],
+                    choices=_choices(len(options)),
                     show_choices=False
                 )
                 answer_index = int(answer)
                 break
             except (ValueError, KeyboardInterrupt):
-                console.print("[red]Please enter a valid option number[/red]")
+                self.console.print("[red]Please enter a valid option number[/red]")
         
         # Check answer
         self.session_stats["total"] += 1
@@ -96,49 +126,78 @@ class QuizRunner:
         
         if is_correct:
             self.session_stats["correct"] += 1
-            console.print(f"[green]✅ Correct![/green]")
+            buf = ["[green]✅ Correct![/green]"]
         else:
-            console.print(f"[red]❌ Incorrect![/red]")
-            console.print(f"[dim]Correct answer: {question['correct_answer']}[/dim]")
+            buf = [
+                "[red]❌ Incorrect![/red]",
+                f"[dim]Correct answer: {question['correct_answer']}[/dim]"
+            ]
         
         # Show explanation
-        console.print(f"[dim]💡 {question['explanation']}[/dim]")
+        buf.append(f"[dim]💡 {question['explanation']}[/dim]")
+        self.console.print("\n".join(buf))
         
-        # Update question statistics
-        self.learning_manager.update_question_stats(question["id"], is_correct)
+        # Update question statistics; saved in one batch when the quiz ends
+        self._pending_updates.append((question["id"], is_correct))
+        cached = self._by_id[question["id"]]
+        cached["times_asked"] = cached.get("times_asked", 0) + 1
+        cached["times_correct"] = cached.get("times_correct", 0) + int(is_correct)
+        self._accuracy_cache.pop(question["id"], None)
+    
+    def _save_pending_updates(self):
+        """Write buffered answer statistics to storage"""
+        if self._pending_updates:
+            self.learning_manager.bulk_update_question_stats(self._pending_updates)
+            self._pending_updates = []
     
     def _show_results(self):
         """Display final quiz results"""
         correct = self.session_stats["correct"]
         total = self.session_stats["total"]
-        percentage = (correct / total) * 100 if total > 0 else 0
-        
-        console.print("\n" + "="*50)
-        console.print(Panel.fit(
-            f"[bold]Quiz Complete![/bold]\n\n"
-            f"Correct answers: [green]{correct}[/green] / [blue]{total}[/blue]\n"
-            f"Accuracy: [bold]{percentage:.1f}%[/bold]\n\n"
-            f"{'🎉 Excellent!' if percentage >= 80 else '📚 Keep practicing!' if percentage >= 60 else '💪 Try again!'}",
-            border_style="green" if percentage >= 80 else "yellow" if percentage >= 60 else "red"
+        # Nothing was asked (e.g. 'quiz 0')
+        if total == 0:
+            return
+        
+        percentage = (correct / total) * 100
+        
+        # Separator and results panel rendered together in one pass
+        self.console.print(self.Group(
+            "",
+            "=" * 50,
+            self.Panel.fit(
+                f"[bold]Quiz Complete![/bold]\n\n"
+                f"Correct answers: [green]{correct}[/green] / [blue]{total}[/blue]\n"
+                f"Accuracy: [bold]{percentage:.1f}%[/bold]\n\n"
+                f"{'🎉 Excellent!' if percentage >= 80 else '📚 Keep practicing!' if percentage >= 60 else '💪 Try again!'}",
+                border_style="green" if percentage >= 80 else "yellow" if percentage >= 60 else "red"
+            )
         ))
     
+    def _accuracy(self, question: Dict) -> float:
+        """Get a question's accuracy, memoized until its stats change"""
+        if question["id"] not in self._accuracy_cache:
+            attempts = question.get("times_asked", 0)
+            correct = question.get("times_correct", 0)
+            self._accuracy_cache[question["id"]] = (correct / attempts) if attempts > 0 else 0
+        return self._accuracy_cache[question["id"]]
+    
     def show_stats(self):
         """Display learning statistics"""
         stats = self.learning_manager.get_stats()
-        questions = self.learning_manager.get_all_questions()
+        questions = self.questions
         
         if not questions:
-            console.print("[yellow]📊 No learning data yet![/yellow]")
-            console.print("[dim]Use './l <command>' to create questions first[/dim]")
+            self.console.print("[yellow]📊 No learning data yet![/yellow]")
+            self.console.print("[dim]Use './l <command>' to create questions first[/dim]")
             return
         
-        console.print(Panel.fit(
+        self.console.print(self.Panel.fit(
             "[bold blue]📊 Learning Statistics[/bold blue]",
             border_style="blue"
         ))
         
         # Overall stats table
-        table = Table(title="Overall Progress")
+        table = self.Table(title="Overall Progress")
         table.add_column("Metric", style="cyan")
         table.add_column("Value", style="green")
         
@@ -147,34 +206,36 @@ class QuizRunner:
         table.add_row("Correct Answers", str(stats.get("total_correct", 0)))
         table.add_row("Accuracy Rate", f"{stats.get('accuracy_rate', 0):.1%}")
         
-        console.print(table)
+        self.console.print(table)
         
         # Questions difficulty table
         if questions:
-            console.print("\n")
-            difficulty_table = Table(title="Question Difficulty")
+            self.console.print("\n")
+            difficulty_table = self.Table(title="Question Difficulty")
             difficulty_table.add_column("Command", style="yellow", max_width=40)
             difficulty_table.add_column("Attempts", style="blue")
             difficulty_table.add_column("Correct", style="green")
             difficulty_table.add_column("Accuracy", style="cyan")
             
-            for q in sorted(questions, key=lambda x: x.get("times_asked", 0), reverse=True)[:10]:
-                attempts = q.get("times_asked", 0)
-                correct = q.get("times_correct", 0)
-                accuracy = (correct / attempts) if attempts > 0 else 0
-                
-                difficulty_table.add_row(
+            # Format every cell up front, then hand the finished rows to the table
+            rows = [
+                (
                     q["correct_answer"],
-                    str(attempts),
-                    str(correct),
-                    f"{accuracy:.1%}" if attempts > 0 else "N/A"
+                    str(q.get("times_asked", 0)),
+                    str(q.get("times_correct", 0)),
+                    f"{self._accuracy(q):.1%}" if q.get("times_asked", 0) > 0 else "N/A"
                 )
+                for q in heapq.nlargest(10, questions, key=lambda x: x.get("times_asked", 0))
+            ]
+            for row in rows:
+                difficulty_table.add_row(*row)
             
-            console.print(difficulty_table)
+            self.console.print(difficulty_table)
 
 def main():
     """Main entry point for quiz"""
     quiz_runner = QuizRunner()
+    console = quiz_runner.console
     
     if len(sys.argv) > 1:
         command = sys.argv[1]
@@ -193,7 +254,7 @@ def main():
         console.print("2. View Statistics") 
         console.print("3. Exit")
         
-        choice = Prompt.ask(
+        choice = quiz_runner.Prompt.ask(
             "\nWhat would you like to do?",
             choices=["1", "2", "3"],
             default="1"
@@ -211,5 +272,7 @@ if __name__ == "__main__":
     try:
         sys.exit(main())
     except KeyboardInterrupt:
-        console.print("\n[dim]Goodbye! 👋[/dim]")
+        # The interrupt may land before a QuizRunner (and its console) exists
+        Console = _import_rich()[0]
+        Console().print("\n[dim]Goodbye! 👋[/dim]")
         sys.exit(0)
@@ -6,20 +6,65 @@ Shell integration for Gemini command completion using -gf flag
 import sys
 import subprocess
 import json
+from collections import OrderedDict
 from typing import Optional
 from src import gemini_client
 from src import command_logger
 
+# Reused across calls when this module is imported by a long-running process
+_gemini: Optional[gemini_client.GeminiClient] = None
+_logger: Optional[command_logger.CommandLogger] = None
+
+# Recent completions by exact partial command (most recently used last)
+_COMPLETION_CACHE_SIZE = 128
+_completion_cache: "OrderedDict[str, str]" = OrderedDict()
+
+def _get_gemini() -> gemini_client.GeminiClient:
+    """Get the shared Gemini client, creating it on first use"""
+    global _gemini
+    if _gemini is None:
+        _gemini = gemini_client.GeminiClient()
+    return _gemini
+
+def _get_logger() -> command_logger.CommandLogger:
+    """Get the shared command logger, creating it on first use"""
+    global _logger
+    if _logger is None:
+        _logger = command_logger.CommandLogger()
+    return _logger
+
+def _cached_complete(partial_command: str) -> Optional[str]:
+    """Complete a command, reusing earlier results for the same partial command"""
+    completed_command = _completion_cache.get(partial_command)
+    if completed_command is not None:
+        _completion_cache.move_to_end(partial_command)
+        return completed_command
+    
+    completed_command = _get_gemini().complete_command(partial_command)
+    
+    # Failures are not cached so a retry can still reach Gemini
+    if completed_command:
+        _completion_cache[partial_command] = completed_command
+        if len(_completion_cache) > _COMPLETION_CACHE_SIZE:
+            _completion_cache.popitem(last=False)
+    return completed_command
+
 def complete_and_execute(args: list[str]) -> int:
     """Complete a command using Gemini and execute it"""
     
-    # Check if -g flag is present
-    if '-g' not in args:
+    # Remove -g flag and reconstruct command, noting whether it was present
+    found_flag = False
+    command_parts = []
+    for arg in args:
+        if arg == '-g':
+            found_flag = True
+        else:
+            command_parts.append(arg)
+    
+    if not found_flag:
         print("Error: -g flag not found", file=sys.stderr)
         return 1
     
-    # Remove -g flag and reconstruct command
-    command_parts = [arg for arg in args if arg != '-g']
     partial_command = ' '.join(command_parts)
     
     if not partial_command.strip():
@@ -28,25 +73,32 @@ def complete_and_execute(args: list[str]) -> int:
     
     try:
         # Get completion from Gemini
-        gemini = gemini_client.GeminiClient()
-        completed_command = gemini.complete_command(partial_command)
+        completed_command = _cached_complete(partial_command)
         
         if not completed_command:
             print(f"No completion found for: {partial_command}", file=sys.stderr)
             return 1
         
         # Log the completion
-        logger = command_logger.CommandLogger()
-        logger.log_completion(partial_command, completed_command)
+        _get_logger().log_completion(partial_command, completed_command)
         
-        # Copy to clipboard (macOS)
+        # Copy to clipboard (macOS) while the command is printed
+        pbcopy = None
         try:
-            subprocess.run(['pbcopy'], input=completed_command, text=True, check=True)
+            pbcopy = subprocess.Popen(['pbcopy'], stdin=subprocess.PIPE, text=True)
+            pbcopy.stdin.write(completed_command)
+            pbcopy.stdin.close()
         except Exception:
             pass  # Silently fail if pbcopy isn't available
         
         # Just output the command, nothing else
-        print(completed_command)
+        print(completed_command, flush=True)
+        
+        if pbcopy is not None:
+            try:
+                pbcopy.wait()
+            except Exception:
+                pass
         
         return 0
         
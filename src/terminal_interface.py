@@ -2,34 +2,128 @@
 Interface for interacting with the terminal application
 """
 
+import asyncio
+import atexit
+import functools
+import json
+import select
 import subprocess
 import logging
+import threading
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# JXA loop run by the persistent osascript worker. Each stdin line is a
+# JSON-encoded AppleScript source; it is run with NSAppleScript and answered
+# with one JSON line holding either "result" or "error".
+_OSA_WORKER_JS = r'''
+ObjC.import('Foundation');
+function run() {
+    const stdin = $.NSFileHandle.fileHandleWithStandardInput;
+    const stdout = $.NSFileHandle.fileHandleWithStandardOutput;
+    let buffer = '';
+    while (true) {
+        const data = stdin.availableData;
+        if (data.length === 0) return;
+        buffer += $.NSString.alloc.initWithDataEncoding(data, $.NSUTF8StringEncoding).js;
+        let nl;
+        while ((nl = buffer.indexOf('\n')) >= 0) {
+            const source = JSON.parse(buffer.slice(0, nl));
+            buffer = buffer.slice(nl + 1);
+            const error = Ref();
+            const result = $.NSAppleScript.alloc.initWithSource(source).executeAndReturnError(error);
+            let reply;
+            if (result.isNil()) {
+                const info = ObjC.deepUnwrap(error[0]) || {};
+                reply = {error: String(info.NSAppleScriptErrorMessage || 'unknown error')};
+            } else {
+                reply = {result: ObjC.unwrap(result.stringValue) || ''};
+            }
+            const line = $.NSString.alloc.initWithUTF8String(JSON.stringify(reply) + '\n');
+            stdout.writeData(line.dataUsingEncoding($.NSUTF8StringEncoding));
+        }
+    }
+}
+'''
+
+# Replacing a command selects the current line and pastes the clipboard over
+# it, so these scripts are constant and never need the command escaped
+# They return the text "true": the osascript worker reports a result through
+# its stringValue, which is nil for a boolean
+_GHOSTTY_PASTE_SCRIPT = '''
+tell application "System Events"
+    tell process "Ghostty"
+        if exists then
+            tell window 1
+                keystroke "a" using command down
+                keystroke "v" using command down
+                return "true"
+            end tell
+        end if
+    end tell
+end tell
+'''
+
+_PASTE_SCRIPT_TEMPLATE = '''
+tell application "System Events"
+    tell process "{terminal}"
+        if exists then
+            keystroke "a" using command down
+            keystroke "v" using command down
+            return "true"
+        end if
+    end tell
+end tell
+'''
+
 class TerminalInterface:
     """Handles interaction with the active terminal application"""
     
+    # Seconds to wait for a single AppleScript to finish
+    SCRIPT_TIMEOUT = 5
+    
     def __init__(self):
         self.supported_terminals = ['Ghostty', 'Terminal', 'iTerm2', 'iTerm']
+        # Long-lived osascript process, started on first use
+        self._osa: Optional[subprocess.Popen] = None
+        self._osa_failed = False
+        self._osa_lock = threading.Lock()
+        atexit.register(self.close)
+        
+        self._paste_scripts = {
+            terminal: _PASTE_SCRIPT_TEMPLATE.format(terminal=terminal)
+            for terminal in self.supported_terminals
+        }
+        
+        # Handlers keyed by lowercased process name, for dispatching on the frontmost app
+        self._command_getters = {"ghostty": self._get_ghostty_command}
+        self._command_replacers = {"ghostty": self._replace_ghostty_command}
+        for terminal in self.supported_terminals:
+            if terminal == "Ghostty":
+                continue
+            self._command_getters[terminal.lower()] = functools.partial(self._get_terminal_command, terminal)
+            self._command_replacers[terminal.lower()] = functools.partial(self._replace_terminal_command, terminal)
+    
+    def _frontmost_app(self) -> Optional[str]:
+        """Get the process name of the frontmost application"""
+        return self._run_applescript(
+            'tell application "System Events" to get name of first application process whose frontmost is true'
+        )
     
     def get_current_command(self) -> Optional[str]:
         """Get the current command line input from the active terminal"""
         try:
-            # Try to get from Ghostty first (user's preferred terminal)
-            command = self._get_ghostty_command()
-            if command:
-                return command
-            
-            # Fallback to other terminals
-            for terminal in self.supported_terminals:
-                command = self._get_terminal_command(terminal)
-                if command:
-                    return command
-                    
-            return None
+            # Only ask the terminal that is actually in front
+            frontmost = self._frontmost_app()
+            if frontmost:
+                getter = self._command_getters.get(frontmost.lower())
+                return getter() if getter else None
             
+            # The frontmost app could not be determined: probe every supported
+            # terminal at once. A known non-terminal app in front gets None above
+            return asyncio.run(self._probe_all())
+        
         except Exception as e:
             logger.error(f"Error getting current command: {e}")
             return None
@@ -37,24 +131,67 @@ class TerminalInterface:
     def replace_current_command(self, new_command: str) -> bool:
         """Replace the current command in the terminal with a new one"""
         try:
+            # The replace scripts paste the new command from the clipboard, so
+            # it is only overwritten once a paste is actually going to happen
+            frontmost = self._frontmost_app()
+            if frontmost:
+                replacer = self._command_replacers.get(frontmost.lower())
+                if replacer is None:
+                    return False
+                self._copy_to_clipboard(new_command)
+                return replacer()
+            
+            self._copy_to_clipboard(new_command)
+            
             # Try Ghostty first
-            if self._replace_ghostty_command(new_command):
+            if self._replace_ghostty_command():
                 return True
             
             # Fallback to other terminals
             for terminal in self.supported_terminals:
-                if self._replace_terminal_command(terminal, new_command):
+                if self._replace_terminal_command(terminal):
                     return True
-                    
-            return False
             
+            return False
+        
         except Exception as e:
             logger.error(f"Error replacing command: {e}")
             return False
     
+    def _copy_to_clipboard(self, text: str):
+        """Put text on the clipboard for the paste scripts"""
+        subprocess.run(['pbcopy'], input=text, text=True, check=True)
+    
+    async def _probe_all(self) -> Optional[str]:
+        """Query all terminals concurrently and return the first command found
+        
+        Results are taken in supported_terminals order, so Ghostty still wins
+        over the others whenever it has a command.
+        """
+        scripts = [self._ghostty_command_script()] + [
+            self._terminal_command_script(terminal)
+            for terminal in self.supported_terminals
+            if terminal != "Ghostty"
+        ]
+        tasks = [asyncio.create_task(self._run_applescript_async(script)) for script in scripts]
+        try:
+            for task in tasks:
+                command = await task
+                if command:
+                    return command
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
     def _get_ghostty_command(self) -> Optional[str]:
         """Get command from Ghostty terminal"""
-        applescript = '''
+        return self._run_applescript(self._ghostty_command_script())
+    
+    def _ghostty_command_script(self) -> str:
+        """AppleScript reading the current command from Ghostty"""
+        return '''
         tell application "System Events"
             tell process "Ghostty"
                 if exists then
@@ -66,79 +203,171 @@ class TerminalInterface:
             end tell
         end tell
         '''
-        return self._run_applescript(applescript)
     
     def _get_terminal_command(self, terminal_name: str) -> Optional[str]:
         """Get command from specified terminal application"""
+        return self._run_applescript(self._terminal_command_script(terminal_name))
+    
+    def _terminal_command_script(self, terminal_name: str) -> str:
+        """AppleScript reading the current command from the specified terminal"""
+        # Checking 'is running' first keeps the probe from launching the app
         if terminal_name == "Terminal":
-            applescript = f'''
-            tell application "{terminal_name}"
-                if (count of windows) > 0 then
-                    tell window 1
-                        tell tab 1
-                            set currentLine to contents of text field 1
-                            return currentLine
+            return f'''
+            if application "{terminal_name}" is running then
+                tell application "{terminal_name}"
+                    if (count of windows) > 0 then
+                        tell window 1
+                            tell tab 1
+                                set currentLine to contents of text field 1
+                                return currentLine
+                            end tell
                         end tell
-                    end tell
-                end if
-            end tell
+                    end if
+                end tell
+            end if
             '''
         else:  # iTerm variants
-            applescript = f'''
-            tell application "{terminal_name}"
-                if (count of windows) > 0 then
-                    tell current session of current tab of current window
-                        set currentLine to contents of text field 1
-                        return currentLine
-                    end tell
-                end if
-            end tell
+            return f'''
+            if application "{terminal_name}" is running then
+                tell application "{terminal_name}"
+                    if (count of windows) > 0 then
+                        tell current session of current tab of current window
+                            set currentLine to contents of text field 1
+                            return currentLine
+                        end tell
+                    end if
+                end tell
+            end if
             '''
-        
-        return self._run_applescript(applescript)
     
-    def _replace_ghostty_command(self, new_command: str) -> bool:
-        """Replace command in Ghostty terminal"""
-        applescript = f'''
-        tell application "System Events"
-            tell process "Ghostty"
-                if exists then
-                    tell window 1
-                        keystroke "a" using command down
-                        keystroke "{new_command}"
-                        return true
-                    end tell
-                end if
-            end tell
-        end tell
-        '''
-        result = self._run_applescript(applescript)
+    def _replace_ghostty_command(self) -> bool:
+        """Paste the clipboard over the current command in Ghostty"""
+        result = self._run_applescript(_GHOSTTY_PASTE_SCRIPT)
         return result == "true"
     
-    def _replace_terminal_command(self, terminal_name: str, new_command: str) -> bool:
-        """Replace command in specified terminal"""
-        applescript = f'''
-        tell application "System Events"
-            tell process "{terminal_name}"
-                if exists then
-                    keystroke "a" using command down
-                    keystroke "{new_command}"
-                    return true
-                end if
-            end tell
-        end tell
-        '''
-        result = self._run_applescript(applescript)
+    def _replace_terminal_command(self, terminal_name: str) -> bool:
+        """Paste the clipboard over the current command in the specified terminal"""
+        result = self._run_applescript(self._paste_scripts[terminal_name])
         return result == "true"
     
+    def _start_osa_worker(self) -> Optional[subprocess.Popen]:
+        """Start the persistent osascript worker unless it is running or unavailable"""
+        if self._osa is not None and self._osa.poll() is None:
+            return self._osa
+        if self._osa_failed:
+            return None
+        
+        try:
+            self._osa = subprocess.Popen(
+                ['osascript', '-l', 'JavaScript', '-e', _OSA_WORKER_JS],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                bufsize=1
+            )
+            return self._osa
+        except Exception as e:
+            logger.warning(f"Persistent osascript unavailable, falling back to one-shot calls: {e}")
+            self._osa_failed = True
+            return None
+    
+    def close(self):
+        """Terminate the persistent osascript worker"""
+        with self._osa_lock:
+            proc, self._osa = self._osa, None
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+    
+    def _run_in_osa_worker(self, script: str):
+        """Run AppleScript in the persistent worker
+        
+        Returns the reply dict, or None if the worker could not be used.
+        """
+        with self._osa_lock:
+            proc = self._start_osa_worker()
+            if proc is None:
+                return None
+            
+            try:
+                proc.stdin.write(json.dumps(script) + '\n')
+                proc.stdin.flush()
+            except Exception as e:
+                return self._osa_worker_died(proc, e)
+            
+            ready, _, _ = select.select([proc.stdout], [], [], self.SCRIPT_TIMEOUT)
+            if not ready:
+                # The script may still be running, so never retry it
+                reply = {"error": "AppleScript execution timed out"}
+            else:
+                line = proc.stdout.readline()
+                if not line:
+                    return self._osa_worker_died(proc, "exited without a reply")
+                try:
+                    return json.loads(line)
+                except ValueError:
+                    reply = {"error": f"bad worker reply: {line!r}"}
+            
+            # The worker is hung or broken; drop it and start fresh next time
+            proc.kill()
+            proc.wait()
+            self._osa = None
+            return reply
+    
+    def _osa_worker_died(self, proc: subprocess.Popen, reason) -> None:
+        """Give up on the worker for good, so this and later calls use one-shot osascript"""
+        logger.warning(f"Persistent osascript failed, falling back to one-shot calls: {reason}")
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        self._osa = None
+        self._osa_failed = True
+        return None
+    
+    async def _run_applescript_async(self, script: str) -> Optional[str]:
+        """Execute AppleScript in its own osascript process without blocking the event loop"""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'osascript', '-e', script,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except Exception as e:
+            logger.error(f"Error running AppleScript: {e}")
+            return None
+        
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), self.SCRIPT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error("AppleScript execution timed out")
+            return None
+        finally:
+            # Also reached when the probe is cancelled because another terminal answered
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+        
+        if proc.returncode == 0:
+            return stdout.decode().strip()
+        logger.warning(f"AppleScript error: {stderr.decode()}")
+        return None
+    
     def _run_applescript(self, script: str) -> Optional[str]:
         """Execute AppleScript and return the result"""
+        reply = self._run_in_osa_worker(script)
+        if reply is not None:
+            if "error" in reply:
+                logger.warning(f"AppleScript error: {reply['error']}")
+                return None
+            return reply["result"].strip()
+        
         try:
             result = subprocess.run(
                 ['osascript', '-e', script],
                 capture_output=True,
                 text=True,
-                timeout=5
+                timeout=self.SCRIPT_TIMEOUT
             )
             
             if result.returncode == 0:
@@ -146,7 +375,7 @@ class TerminalInterface:
             else:
                 logger.warning(f"AppleScript error: {result.stderr}")
                 return None
-                
+        
         except subprocess.TimeoutExpired:
             logger.error("AppleScript execution timed out")
             return None